@@ -0,0 +1,155 @@
+"""
+Тесты очистки директории загрузок/результатов
+"""
+import os
+import threading
+import time
+
+import pytest
+
+import utils
+from utils import CleanupWorker, clean_old_files, get_shard_dir
+
+OLD = time.time() - 5 * 86400
+
+
+def make_files(directory, count, content=b'abc'):
+    paths = []
+    for i in range(count):
+        path = os.path.join(directory, f'file_{i}.png')
+        with open(path, 'wb') as f:
+            f.write(content)
+        paths.append(path)
+    return paths
+
+
+def make_old_flat_file(directory, name='old.png', content=b'zz'):
+    path = os.path.join(directory, name)
+    with open(path, 'wb') as f:
+        f.write(content)
+    os.utime(path, (OLD, OLD))
+    return path
+
+
+def test_expired_shard_removed_current_kept(tmp_path):
+    old_shard = get_shard_dir(str(tmp_path), OLD)
+    current_shard = get_shard_dir(str(tmp_path))
+    make_files(old_shard, 3)
+    make_files(current_shard, 2)
+
+    stats = clean_old_files(str(tmp_path), max_age_hours=24)
+
+    assert not os.path.exists(old_shard)
+    assert len(os.listdir(current_shard)) == 2
+    assert stats['files_removed'] == 3
+    assert stats['bytes_reclaimed'] == 9
+    assert stats['errors'] == 0
+    assert not stats['budget_exhausted']
+
+
+def test_legacy_files_checked_by_mtime(tmp_path):
+    old = make_old_flat_file(str(tmp_path))
+    fresh = make_files(str(tmp_path), 1)[0]
+
+    stats = clean_old_files(str(tmp_path), max_age_hours=24)
+
+    assert not os.path.exists(old)
+    assert os.path.exists(fresh)
+    assert stats['files_removed'] == 1
+    assert stats['bytes_reclaimed'] == 2
+
+
+def test_budget_respected_and_shard_finished_later(tmp_path):
+    old_shard = get_shard_dir(str(tmp_path), OLD)
+    make_files(old_shard, 5)
+
+    stats = clean_old_files(str(tmp_path), max_age_hours=24, max_files=3)
+    assert stats['files_removed'] == 3
+    assert stats['budget_exhausted']
+    assert len(os.listdir(old_shard)) == 2
+
+    stats = clean_old_files(str(tmp_path), max_age_hours=24, max_files=3)
+    assert stats['files_removed'] == 2
+    assert not stats['budget_exhausted']
+    assert not os.path.exists(old_shard)
+
+
+def test_shards_processed_before_legacy_files(tmp_path):
+    old_shard = get_shard_dir(str(tmp_path), OLD)
+    make_files(old_shard, 2)
+    for i in range(5):
+        make_old_flat_file(str(tmp_path), f'old_{i}.png')
+
+    clean_old_files(str(tmp_path), max_age_hours=24, max_files=2)
+
+    assert not os.path.exists(old_shard)
+    assert len(os.listdir(tmp_path)) == 5
+
+
+def test_errors_do_not_stop_pass(tmp_path, monkeypatch):
+    locked = make_old_flat_file(str(tmp_path), 'locked.png')
+    other = make_old_flat_file(str(tmp_path), 'other.png')
+    old_shard = get_shard_dir(str(tmp_path), OLD)
+    make_files(old_shard, 2)
+
+    real_remove = os.remove
+
+    def remove(path):
+        if path == locked:
+            raise PermissionError(path)
+        real_remove(path)
+
+    monkeypatch.setattr(utils.os, 'remove', remove)
+    stats = clean_old_files(str(tmp_path), max_age_hours=24)
+
+    assert os.path.exists(locked)
+    assert not os.path.exists(other)
+    assert not os.path.exists(old_shard)
+    assert stats['errors'] == 1
+    assert stats['files_removed'] == 3
+
+
+def test_worker_run_once_accumulates_metrics(tmp_path):
+    old_shard = get_shard_dir(str(tmp_path), OLD)
+    make_files(old_shard, 3)
+    worker = CleanupWorker(str(tmp_path), max_age_hours=24, max_files_per_run=2)
+
+    worker.run_once()
+    worker.run_once()
+    metrics = worker.get_metrics()
+
+    assert metrics['runs'] == 2
+    assert metrics['files_removed'] == 3
+    assert metrics['bytes_reclaimed'] == 9
+    assert metrics['errors'] == 0
+    assert metrics['last_run'] is not None
+    assert not os.path.exists(old_shard)
+
+
+def test_worker_without_budget_waits_interval(tmp_path, monkeypatch):
+    make_files(get_shard_dir(str(tmp_path), OLD), 3)
+    worker = CleanupWorker(str(tmp_path), max_age_hours=24,
+                           interval_seconds=60, max_files_per_run=None)
+    waited = threading.Event()
+    real_wait = worker._stop_event.wait
+
+    def wait(timeout=None):
+        waited.set()
+        return real_wait(timeout)
+
+    monkeypatch.setattr(worker._stop_event, 'wait', wait)
+    worker.start()
+    try:
+        assert waited.wait(5)
+        assert worker.is_alive()
+        assert worker.get_metrics()['runs'] == 1
+        assert worker.get_metrics()['files_removed'] == 3
+    finally:
+        worker.stop(timeout=5)
+    assert not worker.is_alive()
+
+
+@pytest.mark.parametrize('budget', [0, -1])
+def test_worker_rejects_non_positive_budget(tmp_path, budget):
+    with pytest.raises(ValueError):
+        CleanupWorker(str(tmp_path), max_files_per_run=budget)
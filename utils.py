@@ -1,4 +1,7 @@
 import os
+import threading
+import time
+from datetime import datetime, timedelta
 from PIL import Image, ImageDraw
 import numpy as np
 import matplotlib.pyplot as plt
@@ -124,14 +127,210 @@ def create_histogram(image: Image.Image, save_path: str, title: str):
     
     return save_path
 
-def clean_old_files(directory: str, max_age_hours: int = 24):
-    """Очистка старых файлов"""
-    import time
-    current_time = time.time()
-    
-    for filename in os.listdir(directory):
-        filepath = os.path.join(directory, filename)
-        if os.path.isfile(filepath):
-            file_age = current_time - os.path.getmtime(filepath)
-            if file_age > max_age_hours * 3600:  # Конвертируем часы в секунды
-                os.remove(filepath)
\ No newline at end of file
+SHARD_DATE_FORMAT = '%Y-%m-%d'
+
+
+def get_shard_dir(directory: str, timestamp: float = None) -> str:
+    """
+    Возвращает (и при необходимости создает) поддиректорию-шард за дату
+
+    Новые файлы следует сохранять в шард текущего дня: тогда истекшие
+    шарды удаляются целиком, без проверки каждого файла.
+    """
+    if timestamp is None:
+        timestamp = time.time()
+    shard = datetime.fromtimestamp(timestamp).strftime(SHARD_DATE_FORMAT)
+    path = os.path.join(directory, shard)
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+def _parse_shard_date(name: str):
+    """Дата шарда по имени директории или None, если это не шард"""
+    try:
+        return datetime.strptime(name, SHARD_DATE_FORMAT)
+    except ValueError:
+        return None
+
+
+def _budget_left(stats: dict, max_files: int = None) -> bool:
+    """Проверяет бюджет удаления; при исчерпании выставляет budget_exhausted"""
+    if max_files is not None and stats['files_removed'] >= max_files:
+        stats['budget_exhausted'] = True
+        return False
+    return True
+
+
+def _remove_file(path: str, size: int, stats: dict):
+    """Удаляет файл и учитывает его в статистике"""
+    os.remove(path)
+    stats['files_removed'] += 1
+    stats['bytes_reclaimed'] += size
+
+
+def _remove_tree(path: str, stats: dict, max_files: int = None) -> bool:
+    """
+    Удаляет содержимое директории через os.scandir с учетом бюджета
+
+    Ошибки по отдельным записям учитываются в stats['errors'] и не
+    прерывают обход.
+
+    Returns:
+        True, если директория удалена полностью
+    """
+    complete = True
+    try:
+        with os.scandir(path) as entries:
+            for entry in entries:
+                if not _budget_left(stats, max_files):
+                    return False
+                try:
+                    if entry.is_dir(follow_symlinks=False):
+                        complete = _remove_tree(entry.path, stats, max_files) and complete
+                        if stats['budget_exhausted']:
+                            return False
+                        continue
+                    _remove_file(entry.path, entry.stat(follow_symlinks=False).st_size, stats)
+                except FileNotFoundError:
+                    continue
+                except OSError:
+                    stats['errors'] += 1
+                    complete = False
+    except OSError:
+        stats['errors'] += 1
+        return False
+    if complete:
+        try:
+            os.rmdir(path)
+        except OSError:
+            stats['errors'] += 1
+            return False
+    return complete
+
+
+def clean_old_files(directory: str, max_age_hours: int = 24, max_files: int = None) -> dict:
+    """
+    Очистка старых файлов
+
+    Сначала удаляются шарды по датам (см. get_shard_dir), которые целиком
+    старше порога, - без проверки времени изменения каждого файла. Остаток
+    бюджета тратится на файлы в корне директории (старая плоская схема),
+    которые проверяются по mtime.
+
+    Args:
+        directory: Директория с загрузками/результатами
+        max_age_hours: Максимальный возраст файлов в часах
+        max_files: Максимум удаляемых файлов за один запуск (None - без ограничений)
+
+    Returns:
+        Словарь со статистикой: files_removed, bytes_reclaimed, errors и
+        budget_exhausted (проход остановлен из-за исчерпания бюджета)
+    """
+    stats = {'files_removed': 0, 'bytes_reclaimed': 0, 'errors': 0, 'budget_exhausted': False}
+    if not os.path.isdir(directory):
+        return stats
+
+    cutoff = time.time() - max_age_hours * 3600  # Конвертируем часы в секунды
+    shards = []
+    flat_files = []
+
+    with os.scandir(directory) as entries:
+        for entry in entries:
+            try:
+                if entry.is_dir(follow_symlinks=False):
+                    shard_date = _parse_shard_date(entry.name)
+                    if shard_date is not None:
+                        shards.append((shard_date, entry.path))
+                elif entry.is_file(follow_symlinks=False):
+                    flat_files.append(entry)
+            except OSError:
+                stats['errors'] += 1
+
+    # Шард истек, если истек конец его дня; более новые шарды не трогаем
+    for shard_date, path in sorted(shards):
+        if (shard_date + timedelta(days=1)).timestamp() > cutoff:
+            break
+        _remove_tree(path, stats, max_files)
+        if stats['budget_exhausted']:
+            return stats
+
+    for entry in flat_files:
+        if not _budget_left(stats, max_files):
+            break
+        try:
+            st = entry.stat(follow_symlinks=False)
+            if st.st_mtime < cutoff:
+                _remove_file(entry.path, st.st_size, stats)
+        except FileNotFoundError:
+            continue
+        except OSError:
+            stats['errors'] += 1
+
+    return stats
+
+
+class CleanupWorker(threading.Thread):
+    """
+    Фоновая периодическая очистка директории вне обработки запросов
+
+    Пример:
+        worker = CleanupWorker(UPLOAD_FOLDER, max_age_hours=24)
+        worker.start()
+        ...
+        worker.get_metrics()
+    """
+
+    def __init__(self, directory: str, max_age_hours: int = 24,
+                 interval_seconds: int = 600, max_files_per_run: int = 1000):
+        if max_files_per_run is not None and max_files_per_run <= 0:
+            raise ValueError("max_files_per_run должен быть положительным числом или None")
+        super().__init__(name='cleanup-worker', daemon=True)
+        self.directory = directory
+        self.max_age_hours = max_age_hours
+        self.interval_seconds = interval_seconds
+        self.max_files_per_run = max_files_per_run
+        self._stop_event = threading.Event()
+        self._lock = threading.Lock()
+        self._metrics = {
+            'runs': 0,
+            'files_removed': 0,
+            'bytes_reclaimed': 0,
+            'errors': 0,
+            'last_run': None,
+        }
+
+    def run_once(self) -> dict:
+        """Один проход очистки с обновлением метрик"""
+        try:
+            stats = clean_old_files(self.directory, self.max_age_hours,
+                                    self.max_files_per_run)
+        except OSError:
+            # Например, недоступна сама директория
+            stats = {'files_removed': 0, 'bytes_reclaimed': 0, 'errors': 1,
+                     'budget_exhausted': False}
+
+        with self._lock:
+            self._metrics['runs'] += 1
+            self._metrics['files_removed'] += stats['files_removed']
+            self._metrics['bytes_reclaimed'] += stats['bytes_reclaimed']
+            self._metrics['errors'] += stats['errors']
+            self._metrics['last_run'] = time.time()
+        return stats
+
+    def run(self):
+        while not self._stop_event.is_set():
+            stats = self.run_once()
+            # Бюджет исчерпан - продолжаем сразу, иначе ждем интервал
+            if not stats['budget_exhausted']:
+                self._stop_event.wait(self.interval_seconds)
+
+    def stop(self, timeout: float = None):
+        """Останавливает воркер"""
+        self._stop_event.set()
+        if self.is_alive():
+            self.join(timeout)
+
+    def get_metrics(self) -> dict:
+        """Копия накопленных метрик: runs, files_removed, bytes_reclaimed, errors, last_run"""
+        with self._lock:
+            return dict(self._metrics)